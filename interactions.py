@@ -1,5 +1,5 @@
 from playwright.async_api import async_playwright, Page, TimeoutError as PlaywrightTimeoutError
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
 import asyncio
 import logging
 
@@ -150,7 +150,11 @@ async def follow_pagination(page: Page, base_url: str) -> List[str]:
     return pages
 
 
-async def perform_interactions(page: Page, base_url: str) -> Dict[str, Any]:
+async def perform_interactions(
+    page: Page,
+    base_url: str,
+    on_step: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
     interactions = {
         "clicks": [],
         "scrolls": 0,
@@ -165,18 +169,29 @@ async def perform_interactions(page: Page, base_url: str) -> Dict[str, Any]:
         logger.warning(f"Infinite scroll failed: {e}")
         interactions["scrolls"] = 3
     
+    if on_step:
+        on_step("scroll", {"scrolls": interactions["scrolls"]})
+    
     try:
         tab_clicks = await click_tabs(page)
         interactions["clicks"].extend(tab_clicks)
         logger.info(f"Completed {len(tab_clicks)} clicks")
     except Exception as e:
         logger.warning(f"Tab clicks failed: {e}")
+        tab_clicks = []
+    
+    if on_step:
+        on_step("tabs", {"clicks": tab_clicks})
     
     try:
         load_more_clicks = await click_load_more(page)
         interactions["clicks"].extend(load_more_clicks)
     except Exception as e:
         logger.warning(f"Load more clicks failed: {e}")
+        load_more_clicks = []
+    
+    if on_step:
+        on_step("loadMore", {"clicks": load_more_clicks})
     
     if len(interactions["pages"]) < 2 and len(interactions["clicks"]) < 2:
         try:
@@ -185,5 +200,8 @@ async def perform_interactions(page: Page, base_url: str) -> Dict[str, Any]:
             logger.info(f"Visited {len(pagination_pages)} pages")
         except Exception as e:
             logger.warning(f"Pagination failed: {e}")
+        
+        if on_step:
+            on_step("pagination", {"pages": interactions["pages"]})
     
     return interactions
@@ -1,12 +1,17 @@
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Request, Header
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, HttpUrl, ValidationError
 from typing import Optional
+import json
 import logging
+import os
+import secrets
 
-from scraper import scrape_url
+from scraper import scrape_url, scrape_url_events, invalid_url_events
+from site_templates import get_template
+from profiling import run_profiled
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,6 +23,22 @@ templates = Jinja2Templates(directory="templates")
 
 class ScrapeRequest(BaseModel):
     url: HttpUrl
+    dedupeTemplates: bool = False
+    profile: bool = False
+
+
+def require_admin(admin_token: Optional[str]) -> None:
+    expected = os.environ.get("SCRAPER_ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(
+            status_code=403,
+            detail="Profiling is disabled. Set SCRAPER_ADMIN_TOKEN to enable it."
+        )
+    if not admin_token or not secrets.compare_digest(admin_token.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=403,
+            detail="Profiling requires a valid X-Admin-Token header."
+        )
 
 
 @app.get("/healthz")
@@ -36,7 +57,7 @@ async def index(request: Request):
 
 
 @app.post("/scrape")
-async def scrape(payload: ScrapeRequest):
+async def scrape(payload: ScrapeRequest, x_admin_token: Optional[str] = Header(None)):
     url = str(payload.url)
     
     if not url.startswith(("http://", "https://")):
@@ -45,8 +66,18 @@ async def scrape(payload: ScrapeRequest):
             detail="Invalid URL. Only http and https protocols are supported."
         )
     
+    if payload.profile:
+        require_admin(x_admin_token)
+    
     try:
-        result = await scrape_url(url)
+        if payload.profile:
+            result, profile = await run_profiled(
+                url,
+                lambda: scrape_url(url, payload.dedupeTemplates)
+            )
+            return {"result": result, "profile": profile}
+        
+        result = await scrape_url(url, payload.dedupeTemplates)
         return {"result": result}
     except Exception as e:
         logger.error(f"Scraping failed for {url}: {str(e)}")
@@ -54,3 +85,38 @@ async def scrape(payload: ScrapeRequest):
             status_code=500,
             detail=f"Scraping failed: {str(e)}"
         )
+
+
+@app.get("/scrape/stream")
+async def scrape_stream(url: str, dedupeTemplates: bool = False):
+    # Always answer 200: EventSource cannot read the body of an error
+    # response, so validation failures are reported as stream events.
+    try:
+        payload = ScrapeRequest(url=url, dedupeTemplates=dedupeTemplates)
+        events = scrape_url_events(str(payload.url), payload.dedupeTemplates)
+    except ValidationError:
+        events = invalid_url_events(
+            url,
+            "Invalid URL. Only http and https protocols are supported."
+        )
+    
+    async def event_stream():
+        async for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/templates/{ref}")
+async def site_template(ref: str):
+    entry = get_template(ref)
+    if entry is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Template not found. It may have been evicted from the cache."
+        )
+    return {"template": entry}
@@ -3,6 +3,15 @@ from urllib.parse import urljoin
 from typing import List, Dict, Any, Optional
 import re
 
+from site_templates import (
+    TEMPLATE_SECTION_TYPES,
+    get_domain,
+    template_hash,
+    lookup_template,
+    store_template,
+    build_template_section,
+)
+
 
 def remove_noise_elements(soup: BeautifulSoup) -> None:
     noise_selectors = [
@@ -268,13 +277,14 @@ def extract_headings(element) -> List[str]:
     return headings
 
 
-def parse_sections(html: str, base_url: str) -> List[Dict[str, Any]]:
+def parse_sections(html: str, base_url: str, dedupe_templates: bool = False) -> List[Dict[str, Any]]:
     soup = BeautifulSoup(html, 'lxml')
     
     remove_noise_elements(soup)
     
     sections = []
     section_id_counter = 0
+    domain = get_domain(base_url)
     
     semantic_tags = soup.find_all(['header', 'nav', 'main', 'section', 'article', 'aside', 'footer'])
     
@@ -289,6 +299,17 @@ def parse_sections(html: str, base_url: str) -> List[Dict[str, Any]]:
             continue
         
         section_type = detect_section_type(element)
+        
+        structure_hash = None
+        if dedupe_templates and section_type in TEMPLATE_SECTION_TYPES:
+            structure_hash = template_hash(element, base_url)
+            cached = lookup_template(domain, structure_hash)
+            if cached:
+                section_id = f"{section_type}-{section_id_counter}"
+                sections.append(build_template_section(cached, section_id, base_url))
+                section_id_counter += 1
+                continue
+        
         label = generate_section_label(element, section_type)
         
         raw_html = str(element)
@@ -314,6 +335,9 @@ def parse_sections(html: str, base_url: str) -> List[Dict[str, Any]]:
             "truncated": truncated
         }
         
+        if structure_hash:
+            store_template(domain, structure_hash, section_data)
+        
         sections.append(section_data)
         section_id_counter += 1
     
@@ -324,7 +348,7 @@ def should_use_js_fallback(html: str, sections: List[Dict[str, Any]]) -> bool:
     if len(sections) < 2:
         return True
     
-    total_text = sum(len(s['content']['text']) for s in sections)
+    total_text = sum(len(s['content']['text']) for s in sections if s.get('content'))
     if total_text < 200:
         return True
     
@@ -334,3 +358,20 @@ def should_use_js_fallback(html: str, sections: List[Dict[str, Any]]) -> bool:
             return True
     
     return False
+
+
+def section_key(section: Dict[str, Any]) -> tuple:
+    content = section.get('content')
+    if content is None:
+        return (section['type'], section.get('templateRef'))
+    return (section['type'], content['text'])
+
+
+def diff_sections(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    old_keys = {section_key(s) for s in old}
+    new_keys = {section_key(s) for s in new}
+    
+    return {
+        "added": [s['id'] for s in new if section_key(s) not in old_keys],
+        "removed": [s['id'] for s in old if section_key(s) not in new_keys]
+    }
@@ -0,0 +1,203 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Awaitable, Callable, Tuple
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get("SCRAPER_PROFILE_DIR", "profiles")
+TOP_ALLOCATIONS = 20
+TRACEMALLOC_FRAMES = 10
+SAMPLE_INTERVAL = 0.05
+SNAPSHOT_GROWTH = 1.1
+REQUEST_PHASE = "request"
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+_profile_lock = asyncio.Lock()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.stack: List[Dict[str, Any]] = []
+        self.snapshots: Dict[str, Tuple[int, tracemalloc.Snapshot]] = {}
+        self.lock = threading.Lock()
+
+    def enter(self, name: str) -> Dict[str, Any]:
+        with self.lock:
+            current, peak = tracemalloc.get_traced_memory()
+            for frame in self.stack:
+                frame["peak"] = max(frame["peak"], peak)
+            tracemalloc.reset_peak()
+
+            frame = {"name": name, "start": time.perf_counter(), "peak": current}
+            self.stack.append(frame)
+            return frame
+
+    def exit(self, frame: Dict[str, Any]) -> None:
+        with self.lock:
+            _, peak = tracemalloc.get_traced_memory()
+            frame["peak"] = max(frame["peak"], peak)
+            self.stack.remove(frame)
+            for parent in self.stack:
+                parent["peak"] = max(parent["peak"], frame["peak"])
+
+            phase = self.phases.setdefault(frame["name"], {"calls": 0, "seconds": 0.0, "peakBytes": 0})
+            phase["calls"] += 1
+            phase["seconds"] += time.perf_counter() - frame["start"]
+            phase["peakBytes"] = max(phase["peakBytes"], frame["peak"])
+
+    def sample(self) -> None:
+        # Snapshot whenever traced memory reaches a new high for the
+        # innermost running phase (or the request as a whole), so the top
+        # allocation sites reflect what drove the peak rather than what
+        # survived until the end. Snapshots are slow, so this only runs
+        # on the sampler thread or via asyncio.to_thread.
+        with self.lock:
+            if not tracemalloc.is_tracing():
+                return
+            current, _ = tracemalloc.get_traced_memory()
+            names = [REQUEST_PHASE]
+            if self.stack:
+                names.append(self.stack[-1]["name"])
+
+            stale = [n for n in names if current > self.snapshots.get(n, (0, None))[0] * SNAPSHOT_GROWTH]
+            if not stale:
+                return
+            snapshot = tracemalloc.take_snapshot()
+            for name in stale:
+                self.snapshots[name] = (current, snapshot)
+
+
+class PeakSampler(threading.Thread):
+    def __init__(self, profile: RequestProfile):
+        super().__init__(name="profile-peak-sampler", daemon=True)
+        self.profile = profile
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(SAMPLE_INTERVAL):
+            self.profile.sample()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+
+
+@contextmanager
+def profile_phase(name: str):
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    frame = profile.enter(name)
+    try:
+        yield
+    finally:
+        profile.exit(frame)
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ])
+
+    allocations = []
+    for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+        frame = stat.traceback[0]
+        allocations.append({
+            "site": f"{frame.filename}:{frame.lineno}",
+            "sizeBytes": stat.size,
+            "count": stat.count
+        })
+    return allocations
+
+
+async def run_profiled(
+    label: str,
+    run: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    from pyinstrument import Profiler
+
+    # tracemalloc and the peak counters are process-wide, so only one
+    # profiled request runs at a time. Unprofiled requests running
+    # concurrently still show up in the memory numbers.
+    async with _profile_lock:
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        tracemalloc.reset_peak()
+
+        sampler = PeakSampler(profile)
+        sampler.start()
+        profiler = Profiler(async_mode="enabled")
+        started_at = time.perf_counter()
+        profiler.start()
+        try:
+            result = await run()
+        finally:
+            profiler.stop()
+            duration = time.perf_counter() - started_at
+            await asyncio.to_thread(sampler.stop)
+            await asyncio.to_thread(profile.sample)
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            _current_profile.reset(token)
+
+    profile_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:8]}"
+    report = {
+        "id": profile_id,
+        "label": label,
+        "durationSeconds": round(duration, 3),
+        "peakBytes": max([peak] + [p["peakBytes"] for p in profile.phases.values()]),
+        "phases": profile.phases,
+        "topAllocations": [],
+        "callTree": "",
+        "artifacts": {}
+    }
+    # Rendering the call tree, grouping snapshot statistics and writing the
+    # HTML report are all slow, so keep them off the event loop.
+    await asyncio.to_thread(finish_report, report, profile, profiler)
+
+    return result, report
+
+
+def finish_report(report: Dict[str, Any], profile: RequestProfile, profiler) -> None:
+    for name, (_, snapshot) in profile.snapshots.items():
+        if name == REQUEST_PHASE:
+            report["topAllocations"] = top_allocations(snapshot)
+        elif name in report["phases"]:
+            report["phases"][name]["topAllocations"] = top_allocations(snapshot)
+    report["callTree"] = profiler.output_text(unicode=False, color=False)
+
+    write_profile(report, profiler)
+
+
+def write_profile(report: Dict[str, Any], profiler) -> None:
+    html_path = os.path.join(PROFILE_DIR, f"{report['id']}.html")
+    json_path = os.path.join(PROFILE_DIR, f"{report['id']}.json")
+
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(html_path, "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+        report["artifacts"] = {"html": html_path, "summary": json_path}
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    except OSError as e:
+        logger.warning(f"Failed to write profile {report['id']}: {e}")
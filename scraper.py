@@ -1,10 +1,12 @@
 import httpx
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Callable, Optional, Tuple
+import asyncio
 import logging
 
-from parsers import extract_meta, parse_sections, should_use_js_fallback
+from parsers import extract_meta, parse_sections, should_use_js_fallback, diff_sections
 from interactions import perform_interactions
+from profiling import profile_phase
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +36,10 @@ async def scrape_static(url: str) -> tuple[str, Dict[str, Any], List[str]]:
         raise
 
 
-async def scrape_with_js(url: str) -> tuple[str, Dict[str, Any], Dict[str, Any], List[str]]:
+async def scrape_with_js(
+    url: str,
+    on_step: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> tuple[str, Dict[str, Any], Dict[str, Any], List[str]]:
     errors = []
     interactions = {"clicks": [], "scrolls": 0, "pages": []}
     
@@ -57,7 +62,8 @@ async def scrape_with_js(url: str) -> tuple[str, Dict[str, Any], Dict[str, Any],
                 await page.goto(url, wait_until='domcontentloaded', timeout=20000)
                 await page.wait_for_timeout(1000)
                 
-                interactions = await perform_interactions(page, url)
+                with profile_phase("perform_interactions"):
+                    interactions = await perform_interactions(page, url, on_step)
                 
                 html = await page.content()
                 
@@ -84,7 +90,7 @@ async def scrape_with_js(url: str) -> tuple[str, Dict[str, Any], Dict[str, Any],
         raise
 
 
-async def scrape_url(url: str) -> Dict[str, Any]:
+async def scrape_url_events(url: str, dedupe_templates: bool = False) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
     errors = []
     scraped_at = datetime.utcnow().isoformat() + "Z"
     interactions = {"clicks": [], "scrolls": 0, "pages": []}
@@ -98,32 +104,72 @@ async def scrape_url(url: str) -> Dict[str, Any]:
     sections = []
     
     try:
-        html, meta, fetch_errors = await scrape_static(url)
+        with profile_phase("scrape_static"):
+            html, meta, fetch_errors = await scrape_static(url)
         errors.extend(fetch_errors)
+        yield "meta", {"url": url, "scrapedAt": scraped_at, "meta": meta}
         
-        sections = parse_sections(html, url)
+        with profile_phase("parse_sections"):
+            sections = parse_sections(html, url, dedupe_templates)
+        yield "sections", {"phase": "static", "sections": sections}
         
         logger.info(f"Attempting JS rendering for interactions: {url}")
+        steps = asyncio.Queue()
+        
+        async def render():
+            with profile_phase("scrape_with_js"):
+                return await scrape_with_js(url, lambda step, data: steps.put_nowait((step, data)))
+        
+        js_task = asyncio.create_task(render())
         try:
-            html_js, meta_js, interactions_js, js_errors = await scrape_with_js(url)
+            while True:
+                next_step = asyncio.ensure_future(steps.get())
+                done, _ = await asyncio.wait({next_step, js_task}, return_when=asyncio.FIRST_COMPLETED)
+                if next_step not in done:
+                    next_step.cancel()
+                    break
+                step, data = next_step.result()
+                yield "interaction", {"step": step, **data}
+            
+            while not steps.empty():
+                step, data = steps.get_nowait()
+                yield "interaction", {"step": step, **data}
+            
+            html_js, meta_js, interactions_js, js_errors = js_task.result()
             errors.extend(js_errors)
             
-            sections_js = parse_sections(html_js, url)
-            if len(sections_js) > len(sections):
+            with profile_phase("parse_sections"):
+                sections_js = parse_sections(html_js, url, dedupe_templates)
+            replaces_static = len(sections_js) > len(sections)
+            yield "sections", {
+                "phase": "js",
+                "sections": sections_js,
+                "replacesStatic": replaces_static,
+                "diff": diff_sections(sections, sections_js)
+            }
+            if replaces_static:
                 sections = sections_js
             
             if meta_js.get('title'):
                 meta = meta_js
+                yield "meta", {"url": url, "scrapedAt": scraped_at, "meta": meta}
             interactions = interactions_js
         except Exception as e:
             logger.warning(f"JS rendering failed, using static result: {e}")
-            errors.append({"message": "JS rendering failed, no interactions performed", "phase": "render"})
+            error = {"message": "JS rendering failed, no interactions performed", "phase": "render"}
+            errors.append(error)
+            yield "scrapeError", error
+        finally:
+            if not js_task.done():
+                js_task.cancel()
         
     except Exception as e:
         logger.error(f"Scraping failure for {url}: {e}")
-        errors.append({"message": str(e), "phase": "fetch"})
+        error = {"message": str(e), "phase": "fetch"}
+        errors.append(error)
+        yield "scrapeError", error
     
-    return {
+    yield "done", {
         "url": url,
         "scrapedAt": scraped_at,
         "meta": meta,
@@ -131,3 +177,29 @@ async def scrape_url(url: str) -> Dict[str, Any]:
         "interactions": interactions,
         "errors": errors
     }
+
+
+async def invalid_url_events(url: str, message: str) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    error = {"message": message, "phase": "fetch"}
+    yield "scrapeError", error
+    yield "done", {
+        "url": url,
+        "scrapedAt": datetime.utcnow().isoformat() + "Z",
+        "meta": {
+            "title": "",
+            "description": "",
+            "language": "en",
+            "canonical": None
+        },
+        "sections": [],
+        "interactions": {"clicks": [], "scrolls": 0, "pages": []},
+        "errors": [error]
+    }
+
+
+async def scrape_url(url: str, dedupe_templates: bool = False) -> Dict[str, Any]:
+    result = {}
+    async for event, data in scrape_url_events(url, dedupe_templates):
+        if event == "done":
+            result = data
+    return result
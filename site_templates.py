@@ -0,0 +1,151 @@
+from bs4 import Comment, NavigableString, Tag
+from collections import OrderedDict
+from urllib.parse import urljoin, urlparse
+from typing import Dict, Any, List, Optional
+import copy
+import hashlib
+import re
+import threading
+
+TEMPLATE_SECTION_TYPES = {"header", "nav", "footer", "aside"}
+
+MAX_DOMAINS = 256
+MAX_TEMPLATES_PER_DOMAIN = 64
+
+_cache: "OrderedDict[str, OrderedDict[str, Dict[str, Any]]]" = OrderedDict()
+_lock = threading.Lock()
+
+STATE_ATTRIBUTES = {"aria-current", "aria-selected", "aria-expanded", "aria-pressed"}
+URL_ATTRIBUTES = {"href", "src", "data-src"}
+
+_whitespace_re = re.compile(r'\s+')
+_state_class_re = re.compile(r'(^|[-_])(active|current|selected|open)([-_]|$)')
+
+
+def get_domain(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def normalize_attributes(tag, base_url: str) -> List[str]:
+    attrs = []
+    for name, value in sorted(tag.attrs.items()):
+        if name in STATE_ATTRIBUTES:
+            continue
+        if name == 'class':
+            value = [c for c in value if not _state_class_re.search(c)]
+            if not value:
+                continue
+        elif name in URL_ATTRIBUTES:
+            value = urljoin(base_url, value)
+        if isinstance(value, list):
+            value = ' '.join(value)
+        attrs.append(f"{name}={value}")
+    return attrs
+
+
+def template_hash(element, base_url: str) -> str:
+    # Links and images are resolved against base_url before hashing, so a
+    # section with relative URLs only matches pages where they resolve to
+    # the same targets. Per-page state such as the active nav item is
+    # dropped so the same nav still matches across pages.
+    parts = []
+    for node in [element, *element.descendants]:
+        if isinstance(node, Tag):
+            parts.append(f"<{node.name} {' '.join(normalize_attributes(node, base_url))}>")
+        elif isinstance(node, NavigableString) and not isinstance(node, Comment):
+            text = _whitespace_re.sub(' ', str(node)).strip()
+            if text:
+                parts.append(text)
+
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def make_template_ref(domain: str, structure_hash: str) -> str:
+    return f"{domain}:{structure_hash}"
+
+
+def lookup_template(domain: str, structure_hash: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        templates = _cache.get(domain)
+        if templates is None:
+            return None
+        entry = templates.get(structure_hash)
+        if entry is None:
+            return None
+        _cache.move_to_end(domain)
+        templates.move_to_end(structure_hash)
+        return entry
+
+
+def store_template(domain: str, structure_hash: str, section: Dict[str, Any]) -> None:
+    # The cache is shared by every caller, so the page the template was
+    # first seen on is kept beside the template and never returned; it
+    # can carry another caller's query string or private path.
+    entry = {
+        "template": {
+            "ref": make_template_ref(domain, structure_hash),
+            "type": section["type"],
+            "label": section["label"],
+            "content": copy.deepcopy(section["content"]),
+            "rawHtml": section["rawHtml"],
+            "truncated": section["truncated"],
+        },
+        "sourceUrl": section["sourceUrl"],
+    }
+
+    with _lock:
+        templates = _cache.get(domain)
+        if templates is None:
+            templates = OrderedDict()
+            _cache[domain] = templates
+            if len(_cache) > MAX_DOMAINS:
+                _cache.popitem(last=False)
+        _cache.move_to_end(domain)
+
+        templates[structure_hash] = entry
+        templates.move_to_end(structure_hash)
+        if len(templates) > MAX_TEMPLATES_PER_DOMAIN:
+            templates.popitem(last=False)
+
+
+def build_template_section(entry: Dict[str, Any], section_id: str, base_url: str) -> Dict[str, Any]:
+    template = entry["template"]
+    if entry["sourceUrl"] == base_url:
+        return {
+            "id": section_id,
+            "type": template["type"],
+            "label": template["label"],
+            "sourceUrl": base_url,
+            "content": copy.deepcopy(template["content"]),
+            "rawHtml": template["rawHtml"],
+            "truncated": template["truncated"]
+        }
+
+    return {
+        "id": section_id,
+        "type": template["type"],
+        "label": template["label"],
+        "sourceUrl": base_url,
+        "templateRef": template["ref"],
+        "content": None,
+        "rawHtml": None,
+        "truncated": False
+    }
+
+
+def get_template(ref: str) -> Optional[Dict[str, Any]]:
+    domain, _, structure_hash = ref.rpartition(':')
+    if not domain or not structure_hash:
+        return None
+    entry = lookup_template(domain, structure_hash)
+    if entry is None:
+        return None
+    return entry["template"]
+
+
+def clear_templates(domain: Optional[str] = None) -> None:
+    with _lock:
+        if domain is None:
+            _cache.clear()
+        else:
+            _cache.pop(domain, None)